@@ -0,0 +1,86 @@
+# backend/ann_report.py - recall vs latency of the IVF index against an exact scan
+#
+#   python ann_report.py                      synthetic 50,000-row gallery
+#   python ann_report.py --size 200000 --nprobe 4 8 16 32
+#   python ann_report.py --gallery            the trained gallery on disk
+#
+# Queries are gallery rows plus noise of about the spread between two photos
+# of the same person, so the exact nearest neighbour is the "right" student.
+# Recall@1 is how often the index returns that same row; pick the smallest
+# nprobe that keeps it where you need it and set FaceRecognizer.ANN_NPROBE.
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.utils.ann_index import IVFIndex
+from app.utils.gallery_store import GalleryStore
+from app.utils.matcher import ENCODING_DIM, FaceMatcher
+
+
+def synthetic_gallery(size, seed=0):
+    """Encodings spread like face_recognition's: different people ~0.9 apart."""
+    rng = np.random.default_rng(seed)
+    # A few broad "demographic" clusters, people scattered around them
+    centers = rng.normal(scale=0.06, size=(32, ENCODING_DIM))
+    people = centers[rng.integers(0, len(centers), size)] + rng.normal(scale=0.06, size=(size, ENCODING_DIM))
+    return [f"student{i}" for i in range(size)], people.astype(np.float32)
+
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall / latency report for the ANN gallery index")
+    parser.add_argument("--gallery", action="store_true", help="Use the trained gallery instead of synthetic data")
+    parser.add_argument("--size", type=int, default=50000, help="Synthetic gallery rows")
+    parser.add_argument("--queries", type=int, default=200, help="Query faces")
+    parser.add_argument("--batch", type=int, default=20, help="Faces per photo (one top_k call)")
+    parser.add_argument("--lists", type=int, default=None, help="IVF partitions (default sqrt(N))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--noise", type=float, default=0.025, help="Per-dimension query noise")
+    args = parser.parse_args()
+
+    if args.gallery:
+        store = GalleryStore(Path(__file__).parent / "app" / "reference_encodings" / "gallery")
+        emails, embeddings, _, _ = store.load()
+    else:
+        emails, embeddings = synthetic_gallery(args.size)
+
+    rng = np.random.default_rng(1)
+    targets = rng.integers(0, len(emails), args.queries)
+    queries = embeddings[targets] + rng.normal(scale=args.noise, size=(args.queries, ENCODING_DIM))
+    batches = [queries[i:i + args.batch] for i in range(0, len(queries), args.batch)]
+
+    exact = FaceMatcher(embeddings, emails)
+    exact_results, exact_ms = timed(lambda: [exact.top_k(b, 5) for b in batches], 1)
+    truth = np.concatenate([idx for idx, _ in exact_results])
+
+    start = time.perf_counter()
+    index = IVFIndex.train(embeddings, emails, n_lists=args.lists)
+    build_s = time.perf_counter() - start
+
+    print(f"Gallery: {len(emails)} rows, {len(index.centroids)} lists, built in {build_s:.1f}s")
+    print(f"Queries: {args.queries} in batches of {args.batch}\n")
+    print(f"{'method':<14}{'recall@1':>10}{'recall@5':>10}{'ms/photo':>10}{'speed-up':>10}")
+    print(f"{'exact':<14}{1.0:>10.3f}{1.0:>10.3f}{exact_ms / len(batches):>10.2f}{1.0:>10.1f}")
+
+    for nprobe in args.nprobe:
+        if nprobe > len(index.centroids):
+            continue
+        index.nprobe = nprobe
+        results, ms = timed(lambda: [index.top_k(b, 5) for b in batches], 1)
+        found = np.concatenate([r for r, _ in results])
+        recall1 = np.mean(found[:, 0] == truth[:, 0])
+        recall5 = np.mean([len(set(f) & set(t)) / 5 for f, t in zip(found, truth)])
+        print(f"{f'ivf nprobe={nprobe}':<14}{recall1:>10.3f}{recall5:>10.3f}"
+              f"{ms / len(batches):>10.2f}{exact_ms / ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# backend/app/check_startup.py - how long `import app` takes, and what it pulls in
+#
+#   python check_startup.py                 report, fail if over budget
+#   python check_startup.py --budget 1.5    seconds allowed for the import
+#
+# tests/test_startup.py runs the same check under pytest.
+#
+# Imports app.py in a fresh interpreter with -X importtime. Non-recognition
+# endpoints and the admin scripts (create_subject.py, migrate.py, ...) only
+# pay this cost; the face models must not be part of it, they load on the
+# first recognition or in warm_up(). Exits 1 if a heavy module was imported
+# or the import took longer than the budget.
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Modules app.py must not import at startup
+HEAVY = ("face_recognition", "face_recognition_models", "dlib", "pandas")
+# Seconds allowed for `import app`, interpreter start included
+BUDGET = 2.0
+
+
+def measure():
+    """(seconds, {module: cumulative microseconds}) for `import app` in a new process."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=Path(__file__).parent, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode:
+        sys.exit(f"❌ import app failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return elapsed, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of the API module")
+    parser.add_argument("--budget", type=float, default=BUDGET, help="Seconds allowed for `import app`")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list")
+    args = parser.parse_args()
+
+    elapsed, modules = measure()
+    top_level = {name: us for name, us in modules.items() if "." not in name}
+    print(f"import app: {elapsed:.2f}s (interpreter start included)\n")
+    for name, us in sorted(top_level.items(), key=lambda x: -x[1])[:args.top]:
+        print(f"  {us / 1000:>8.1f} ms  {name}")
+
+    loaded = [name for name in HEAVY if name in modules]
+    if loaded:
+        print(f"\n❌ Imported at startup: {', '.join(loaded)}")
+    if elapsed > args.budget:
+        print(f"\n❌ Over the {args.budget:.1f}s budget")
+    if loaded or elapsed > args.budget:
+        sys.exit(1)
+    print("\n✅ No face models or pandas at startup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# backend/app/gunicorn.conf.py - multi-worker serving
+#
+#   cd backend/app && gunicorn -c gunicorn.conf.py wsgi:app
+#
+# The app, the dlib models and the gallery (wsgi.py calls warm_up()) load
+# once in the master and the workers are forked from it, so they share those pages
+# copy-on-write instead of each loading their own. The gallery matrix is a
+# memory-mapped file, shared through the page cache by every process.
+#
+# After training (or an enrollment in any worker) a new gallery version is
+# published by replacing reference_encodings/gallery/meta.json. Each worker
+# stats that file and student_map.json before recognizing and swaps in the
+# new version on its own; nothing needs restarting.
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", max(2, multiprocessing.cpu_count())))
+# Threads share their worker's recognizer and gallery snapshot
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+# Large group photos and videos take a while on CPU
+timeout = 120
+
+# Each worker has its own async recognition pool; split the cores between
+# them instead of giving every worker half the machine (create_app reads this)
+os.environ.setdefault("RECOGNITION_WORKERS", str(max(1, multiprocessing.cpu_count() // workers)))
+
+# Load models and the gallery in the master, before forking
+preload_app = True
+
+# Recycle workers now and then; they re-fork from the preloaded master
+max_requests = 2000
+max_requests_jitter = 200
+
+
+def when_ready(server):
+    server.log.info("Models and gallery loaded; forking %s workers", workers)
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the garbage collector's reach, so
+    # collections in the workers do not touch (and so copy) the shared pages
+    gc.freeze()
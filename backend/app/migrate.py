@@ -0,0 +1,149 @@
+# backend/app/migrate.py - schema upgrades for existing databases
+#
+# db.create_all() only creates missing tables; it never changes a table that
+# already exists. Upgrades to existing tables live here and are applied once,
+# in order, and recorded in the schema_migrations table.
+#
+#   python migrate.py            apply pending migrations
+#   python migrate.py --list     show applied / pending migrations
+import pickle
+import sys
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from app import app, db, Attendance, AttendanceSession, Subject, SubjectSummary, AttendanceSummary, \
+    Student, User, REFERENCE_ENCODINGS_DIR, get_recognizer, rebuild_attendance_summary
+
+schema_migrations = db.Table(
+    'schema_migrations',
+    db.Column('id', db.String(100), primary_key=True),
+    db.Column('applied_at', db.DateTime, nullable=False),
+)
+
+
+def index_names(table):
+    return {ix['name'] for ix in inspect(db.engine).get_indexes(table)}
+
+
+def create_index(model, name):
+    """Create one of the model's declared indexes if it is not there yet."""
+    if name in index_names(model.__tablename__):
+        return
+    index = next(ix for ix in model.__table__.indexes if ix.name == name)
+    index.create(db.engine)
+
+
+# -------------------- MIGRATIONS --------------------
+
+def attendance_unique_mark():
+    """One attendance row per (subject, date, student); drop duplicates, keep the oldest."""
+    db.session.execute(text("""
+        DELETE FROM attendance WHERE id NOT IN (
+            SELECT keep_id FROM (
+                SELECT MIN(id) AS keep_id FROM attendance
+                GROUP BY subject_id, date, student_id
+            ) AS keep
+        )
+    """))
+    db.session.commit()
+    create_index(Attendance, 'uq_attendance_subject_date_student')
+
+
+def date_columns():
+    """Convert attendance.date and attendance_session.date from VARCHAR(10) to DATE."""
+    dialect = db.engine.dialect.name
+    for table in ("attendance", "attendance_session"):
+        bad = db.session.execute(text(
+            f"SELECT COUNT(*) FROM {table} WHERE date IS NULL OR LENGTH(date) <> 10"
+        )).scalar()
+        if bad:
+            raise Exception(f"{table} has {bad} date value(s) not in YYYY-MM-DD form; fix them first")
+
+        if dialect == "mysql":
+            db.session.execute(text(f"ALTER TABLE {table} MODIFY date DATE NOT NULL"))
+        elif dialect == "postgresql":
+            db.session.execute(text(f"ALTER TABLE {table} ALTER COLUMN date TYPE DATE USING date::date"))
+        # SQLite stores DATE as 'YYYY-MM-DD' text already; nothing to convert
+    db.session.commit()
+
+
+def query_indexes():
+    """Indexes matching the dashboard, history and export query shapes."""
+    for name in ('ix_attendance_student_subject_status', 'ix_attendance_date', 'ix_attendance_created_at'):
+        create_index(Attendance, name)
+    for name in ('ix_attendance_session_subject_date', 'ix_attendance_session_teacher_id'):
+        create_index(AttendanceSession, name)
+    create_index(Subject, 'ix_subject_teacher_id')
+
+
+def attendance_summary():
+    """Create the maintained attendance summary tables and fill them from existing rows."""
+    SubjectSummary.__table__.create(db.engine, checkfirst=True)
+    AttendanceSummary.__table__.create(db.engine, checkfirst=True)
+    rebuild_attendance_summary()
+
+
+def legacy_user_encodings():
+    """Enroll the per-user reference_encodings/<user_id>.pkl faces into the gallery."""
+    recognizer = get_recognizer()
+    for path in sorted(REFERENCE_ENCODINGS_DIR.glob("*.pkl")):
+        if not path.stem.isdigit():
+            continue
+        user = db.session.get(User, int(path.stem))
+        student = Student.query.filter_by(user_id=user.id).first() if user else None
+        if not student:
+            print(f"⚠️  Skipping {path.name}: no student with user id {path.stem}")
+            continue
+        if user.email in recognizer.student_map:
+            # Trained or enrolled since; that encoding is newer
+            continue
+        with open(path, "rb") as f:
+            encoding = pickle.load(f)
+        recognizer.enroll(user.email, encoding, {
+            "student_id": student.id,
+            "roll_number": student.roll_number,
+            "name": user.name,
+            "department": student.department
+        })
+
+
+MIGRATIONS = [
+    ("0001_attendance_unique_mark", attendance_unique_mark),
+    ("0002_date_columns", date_columns),
+    ("0003_query_indexes", query_indexes),
+    ("0004_attendance_summary", attendance_summary),
+    ("0005_legacy_user_encodings", legacy_user_encodings),
+]
+
+
+def applied_migrations():
+    schema_migrations.create(db.engine, checkfirst=True)
+    return {row.id for row in db.session.execute(schema_migrations.select())}
+
+
+def migrate():
+    applied = applied_migrations()
+    pending = [(name, fn) for name, fn in MIGRATIONS if name not in applied]
+
+    if not pending:
+        print("✅ Database is up to date")
+        return
+
+    for name, fn in pending:
+        print(f"→ {name}: {fn.__doc__.strip()}")
+        fn()
+        db.session.execute(schema_migrations.insert().values(id=name, applied_at=datetime.utcnow()))
+        db.session.commit()
+
+    print(f"✅ Applied {len(pending)} migration(s)")
+
+
+if __name__ == "__main__":
+    with app.app_context():
+        if "--list" in sys.argv:
+            applied = applied_migrations()
+            for name, fn in MIGRATIONS:
+                print(f"{'applied' if name in applied else 'pending'}  {name}")
+        else:
+            migrate()
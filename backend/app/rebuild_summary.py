@@ -0,0 +1,10 @@
+# rebuild_summary.py - recompute the attendance summary tables from raw attendance
+#
+# The summaries are kept up to date on every mark; run this after editing
+# attendance rows by hand, or if the totals ever look off.
+from app import app, SubjectSummary, AttendanceSummary, rebuild_attendance_summary
+
+with app.app_context():
+    rebuild_attendance_summary()
+    print(f"✅ Rebuilt summaries: {SubjectSummary.query.count()} subjects, "
+          f"{AttendanceSummary.query.count()} student/subject rows")
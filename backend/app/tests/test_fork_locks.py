@@ -0,0 +1,59 @@
+# backend/app/tests/test_fork_locks.py
+import os
+import signal
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("face_recognition")
+
+from utils import face_recognizer
+from utils.face_recognizer import FaceRecognizer, init_worker, share_with_workers
+
+
+def hold_locks(recognizer, roster, held, release):
+    """Hold every lock a recognition touches until `release` is set."""
+    gallery = recognizer.gallery
+    with recognizer.store.lock(), recognizer._reload_lock, gallery._matcher_lock, gallery.rosters._lock:
+        held.set()
+        release.wait()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_pool_process_forked_while_locks_held_does_not_deadlock(tmp_path):
+    recognizer = FaceRecognizer(base_dir=tmp_path)
+    rng = np.random.default_rng(0)
+    for i in range(3):
+        recognizer.enroll(f"s{i}@x.com", rng.normal(size=128).astype(np.float32), {"name": f"S{i}"})
+    roster = frozenset({"s0@x.com", "s1@x.com"})
+    share_with_workers(recognizer)
+
+    held, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=hold_locks, args=(recognizer, roster, held, release))
+    holder.start()
+    held.wait()
+
+    pid = os.fork()
+    if pid == 0:
+        # Child: what a pool process does before and during its first job
+        signal.alarm(10)
+        try:
+            init_worker()
+            worker = face_recognizer._worker_recognizer
+            worker.reload_if_changed()
+            worker.gallery.matcher_for(roster)
+            worker.gallery.matcher_for(None)
+            with worker.store.lock():
+                pass
+            os._exit(0)
+        except BaseException:
+            os._exit(1)
+
+    # The store's flock is a real cross-process lock: the child waits for
+    # this writer to finish, but no longer
+    release.set()
+    holder.join()
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status), "child was killed by the watchdog (deadlock)"
+    assert os.WEXITSTATUS(status) == 0
@@ -0,0 +1,50 @@
+# backend/app/tests/test_jobs.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from utils.jobs import JobQueue
+
+
+class BreaksAfter(ThreadPoolExecutor):
+    """Pool whose submit() raises BrokenProcessPool after `accepted` tasks have started."""
+
+    def __init__(self, accepted, started):
+        super().__init__(max_workers=2)
+        self.accepted = accepted
+        self.started = started
+
+    def submit(self, fn, *args):
+        if self.accepted == 0:
+            self.started.wait(5)
+            raise BrokenProcessPool("worker died")
+        self.accepted -= 1
+        return super().submit(fn, *args)
+
+
+def test_submit_many_failing_midway_frees_slots_and_cleans_up():
+    started, release, cleaned = threading.Event(), threading.Event(), threading.Event()
+    queue = JobQueue(workers=2, max_pending=4)
+    pool = BreaksAfter(accepted=1, started=started)
+    queue._get_pool = lambda: pool
+
+    def task():
+        started.set()
+        release.wait(5)
+
+    with pytest.raises(BrokenProcessPool):
+        queue.submit_many(task, [(), (), ()], cleanup=cleaned.set)
+
+    # The one accepted task is still running: it holds its slot, and the
+    # cleanup waits for it
+    assert not cleaned.is_set()
+    assert queue._slots._value == 3
+    assert queue._jobs == {}
+    assert queue._pool is None
+
+    release.set()
+    assert cleaned.wait(5)
+    pool.shutdown(wait=True)
+    assert queue._slots._value == 4
@@ -0,0 +1,79 @@
+# backend/app/tests/test_query_counts.py
+#
+# Each endpoint must issue the same number of queries whether it returns N
+# or 2N rows; a count that grows with the rows is an N+1.
+from datetime import date, timedelta
+
+import pytest
+
+from app import db, User, Student, Teacher, Subject, Attendance, AttendanceSession
+from utils.query_counter import assert_constant_queries
+
+N = 4
+
+
+def add_user(email, role):
+    user = User(email=email, password="x", role=role, name=email.split("@")[0])
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+@pytest.fixture
+def school(app):
+    """A teacher with one subject, and a student to request subjects as."""
+    teacher_user = add_user("teacher@example.com", "teacher")
+    teacher = Teacher(user_id=teacher_user.id, employee_id="T0", department="CS")
+    student_user = add_user("viewer@example.com", "student")
+    db.session.add_all([teacher, Student(user_id=student_user.id, roll_number="0", department="CS", semester=1)])
+    db.session.flush()
+    subject = Subject(name="Subject 0", code="S0", department="CS", semester=1, teacher_id=teacher.id)
+    db.session.add(subject)
+    db.session.commit()
+    return {"teacher": teacher_user.id, "teacher_id": teacher.id, "student": student_user.id,
+            "subject": subject.id, "added": 0}
+
+
+def grow(school, count=N):
+    """Add `count` students, each with their own teacher and subject, and attendance rows."""
+    for _ in range(count):
+        i = school["added"] = school["added"] + 1
+        teacher_user = add_user(f"teacher{i}@example.com", "teacher")
+        teacher = Teacher(user_id=teacher_user.id, employee_id=f"T{i}", department="CS")
+        student_user = add_user(f"student{i}@example.com", "student")
+        student = Student(user_id=student_user.id, roll_number=str(i), department="CS", semester=1)
+        db.session.add_all([teacher, student])
+        db.session.flush()
+        subject = Subject(name=f"Subject {i}", code=f"S{i}", department="CS", semester=1, teacher_id=teacher.id)
+        db.session.add(subject)
+        db.session.flush()
+
+        day = date(2024, 1, 1) + timedelta(days=i)
+        for subject_id, teacher_id in ((school["subject"], school["teacher_id"]), (subject.id, teacher.id)):
+            db.session.add(Attendance(date=day, subject_id=subject_id, student_id=student.id, marks=1))
+            db.session.add(AttendanceSession(date=day, subject_id=subject_id, teacher_id=teacher_id, total_marks=1))
+    db.session.commit()
+
+
+def check(app, client, school, path, as_user):
+    def call():
+        # Cached payloads would hide the queries being measured
+        app.extensions["attendance"].teacher_dashboard.clear()
+        response = client.get(path, headers={"x-user-id": str(as_user)})
+        assert response.status_code == 200, response.get_json()
+
+    grow(school)
+    call()  # warms the identity cache
+    return assert_constant_queries(db.engine, call, lambda: grow(school), label=path)
+
+
+def test_subjects_constant_queries(app, client, school):
+    check(app, client, school, "/subjects", school["student"])
+
+
+def test_teacher_dashboard_constant_queries(app, client, school):
+    check(app, client, school, "/dashboard/stats", school["teacher"])
+
+
+def test_attendance_history_constant_queries(app, client, school):
+    check(app, client, school, "/attendance/history", school["teacher"])
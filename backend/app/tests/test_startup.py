@@ -0,0 +1,8 @@
+# backend/app/tests/test_startup.py
+from check_startup import BUDGET, HEAVY, measure
+
+
+def test_import_app_skips_face_models_and_fits_budget():
+    elapsed, modules = measure()
+    assert [name for name in HEAVY if name in modules] == []
+    assert elapsed <= BUDGET, f"import app took {elapsed:.2f}s, budget {BUDGET:.1f}s"
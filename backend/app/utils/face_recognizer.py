@@ -1,93 +1,630 @@
 # backend/app/face_recognizer.py
-import face_recognition
-import pickle
+import cv2
 import numpy as np
+from io import BytesIO
 from pathlib import Path
+from PIL import Image
 import json
+import os
+import threading
+import time
+
+from .ann_index import ANN_MIN_GALLERY, IVFIndex
+from .cache import TTLCache
+from .gallery_store import GalleryStore, migrate_legacy_pickle
+from .matcher import QuantizedMatcher, load_quantized, make_matcher, quantize, save_quantized
+from .video import iter_video_frames, recognize_frames
+
+
+# Per-request memory bounds for uploaded photos
+MAX_IMAGE_BYTES = 25 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000
+
+
+class InvalidImage(Exception):
+    """The upload is not a decodable image."""
+
+
+class ImageTooLarge(InvalidImage):
+    """The upload exceeds MAX_IMAGE_BYTES or cannot be decoded within MAX_IMAGE_PIXELS."""
+
+
+class InvalidVideo(InvalidImage):
+    """The upload is not a video OpenCV can open."""
+
+
+def load_image(source, max_bytes=MAX_IMAGE_BYTES, max_pixels=MAX_IMAGE_PIXELS):
+    """Decode a path, raw bytes or a file-like stream into an RGB numpy array.
+
+    Uploads are decoded straight from the request buffer. Images above
+    max_pixels are reduced while decoding (JPEG draft mode) and then
+    downscaled, so the decoded array never exceeds the bound.
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            data = f.read(max_bytes + 1)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+    else:
+        data = source.read(max_bytes + 1)
+
+    if len(data) > max_bytes:
+        raise ImageTooLarge(f"Image is larger than {max_bytes // (1024 * 1024)} MB")
+
+    try:
+        img = Image.open(BytesIO(data))
+        width, height = img.size
+        if width * height > max_pixels:
+            ratio = (max_pixels / (width * height)) ** 0.5
+            target = (max(1, int(width * ratio)), max(1, int(height * ratio)))
+            # JPEG can decode at 1/2, 1/4 or 1/8 scale without a full-size buffer
+            img.draft("RGB", target)
+            if img.size[0] * img.size[1] > 4 * max_pixels:
+                raise ImageTooLarge(f"Image resolution {width}x{height} is too large")
+            img = img.convert("RGB")
+            img.thumbnail(target, Image.BILINEAR)
+        else:
+            img = img.convert("RGB")
+    except ImageTooLarge:
+        raise
+    except Exception as e:
+        raise InvalidImage(f"Could not decode image: {str(e)}")
+
+    return np.asarray(img)
+
+
+class Gallery:
+    """Immutable snapshot of the trained encodings and the student map.
+
+    A new Gallery is built off to the side and swapped in with a single
+    attribute assignment, so a request never sees a half-loaded state.
+    """
+
+    # Roster sub-matrices kept per snapshot; a reload starts with none
+    ROSTER_CACHE_SIZE = 64
+    ROSTER_CACHE_TTL = 3600
+
+    def __init__(self, known_emails, known_encodings, image_counts, student_map, version,
+                 load_index=None, store_version=None, precision="float32", rerank=8,
+                 load_quantized=None):
+        self.known_emails = known_emails
+        self.known_encodings = known_encodings
+        self.image_counts = image_counts
+        self.student_map = student_map
+        self.version = version
+        self.store_version = store_version
+        self.precision = precision
+        self.rerank = rerank
+        # Whole-gallery matcher, built on first use: with roster-scoped
+        # recognition only roster matchers are ever needed
+        self._load_index = load_index
+        self._load_quantized = load_quantized
+        self.loaded_matcher = None
+        self._quantized = None
+        self._matcher_lock = threading.RLock()
+        self.rosters = TTLCache(maxsize=self.ROSTER_CACHE_SIZE, ttl=self.ROSTER_CACHE_TTL)
+
+    @property
+    def matcher(self):
+        """Large galleries are searched through an ANN index, small ones exactly."""
+        if self.loaded_matcher is None:
+            with self._matcher_lock:
+                if self.loaded_matcher is None:
+                    index = self._load_index() if self._load_index else None
+                    if index is not None:
+                        self.loaded_matcher = index
+                    elif self.precision == "int8":
+                        self.loaded_matcher = QuantizedMatcher(
+                            self.known_encodings, self.known_emails, self.rerank,
+                            quantized=self.quantized
+                        )
+                    else:
+                        self.loaded_matcher = make_matcher(
+                            self.known_encodings, self.known_emails, self.precision, self.rerank
+                        )
+        return self.loaded_matcher
+
+    def after_fork(self):
+        """Fresh locks for a forked child (see FaceRecognizer.after_fork)."""
+        self._matcher_lock = threading.RLock()
+        self.rosters.after_fork()
+
+    @property
+    def quantized(self):
+        """int8 codes of the whole gallery (see matcher.quantize), shared by its matchers."""
+        if self._quantized is None:
+            with self._matcher_lock:
+                if self._quantized is None:
+                    self._quantized = self._load_quantized() if self._load_quantized \
+                        else quantize(self.known_encodings)
+        return self._quantized
+
+    def matcher_for(self, roster=None):
+        """Matcher over the whole gallery, or over just the emails in `roster` (a frozenset).
+
+        Roster matchers hold a copy of their rows, built once and reused
+        for every photo of that roster.
+        """
+        if roster is None:
+            return self.matcher
+        return self.rosters.get_or_set(roster, lambda: self._build_roster_matcher(roster))
+
+    def _build_roster_matcher(self, roster):
+        rows = [i for i, email in enumerate(self.known_emails) if email in roster]
+        if self.precision == "int8":
+            # Only the roster's codes are copied; re-ranking reads the shared store
+            codes, center, scale, code_norms = self.quantized
+            return QuantizedMatcher(
+                self.known_encodings, [self.known_emails[i] for i in rows], self.rerank,
+                rows=rows, quantized=(codes[rows], center, scale, code_norms[rows])
+            )
+        return make_matcher(
+            np.take(self.known_encodings, rows, axis=0),
+            [self.known_emails[i] for i in rows],
+            self.precision, self.rerank
+        )
+
 
 class FaceRecognizer:
-    def __init__(self):
-        self.BASE_DIR = Path(__file__).parent.parent
-        self.load_encodings()
-        self.load_student_map()
-        self.validate_mapping()
+    TOLERANCE = 0.6
 
-    def load_encodings(self):
-        encodings_path = self.BASE_DIR / "reference_encodings" / "encodings.pkl"
+    # Detection defaults; override per call via the `detection` dict
+    DETECTION_MODELS = ("hog", "cnn")
+    # Exact scan below this many gallery rows, IVF index at or above it
+    # (None disables the index); nprobe None uses the index default
+    ANN_MIN_GALLERY = ANN_MIN_GALLERY
+    ANN_NPROBE = None
+    # Representation the exact scan runs on: "float32" (the store's own
+    # matrix), "float64", or "int8" (quantized codes, best GALLERY_RERANK
+    # students per face re-scored in float64 from the store's float32
+    # rows); see validate_quantization.py
+    GALLERY_PRECISION = "float32"
+    GALLERY_RERANK = 8
+
+    DEFAULT_DETECTION = {
+        "model": "hog",
+        "upsample": 1,
+        # Detect on a copy whose longest side is at most this many pixels
+        # (0 disables downscaling). Encodings always use full resolution.
+        "max_side": 1024
+    }
+
+    def __init__(self, base_dir=None):
+        self.BASE_DIR = Path(base_dir) if base_dir else Path(__file__).parent.parent
+        self.store = GalleryStore(self.BASE_DIR / "reference_encodings" / "gallery")
+        self.legacy_encodings_path = self.BASE_DIR / "reference_encodings" / "encodings.pkl"
+        self.map_path = self.BASE_DIR / "student_map.json"
+        self._reload_lock = threading.Lock()
+
+        # Loading face_recognition reads the dlib models; only processes that
+        # build a recognizer pay for it, the rest of the API never imports it
+        import face_recognition  # noqa: F401
+
+        if not self.store.exists() and self.legacy_encodings_path.exists():
+            # One-time upgrade of a pickle written by an older train_model.py
+            print(f"🔄 Converting {self.legacy_encodings_path.name} to the binary gallery format")
+            migrate_legacy_pickle(self.legacy_encodings_path, self.store)
+
+        self.gallery = self.load_gallery()
+
+    def after_fork(self):
+        """Replace the locks inherited through fork with fresh ones.
+
+        Another thread of the parent may have held any of them at that
+        moment; it does not exist in the child, so they would never be
+        released. The store's class-level lock is reset by its own fork hook.
+        """
+        self._reload_lock = threading.Lock()
+        self.gallery.after_fork()
+
+    # Read-only views onto the current snapshot
+    @property
+    def known_emails(self):
+        return self.gallery.known_emails
+
+    @property
+    def known_encodings(self):
+        return self.gallery.known_encodings
+
+    @property
+    def image_counts(self):
+        return self.gallery.image_counts
+
+    @property
+    def student_map(self):
+        return self.gallery.student_map
+
+    def current_version(self):
+        """Change token for the gallery header and the map file; changes whenever training rewrites them."""
         try:
-            with open(encodings_path, "rb") as f:
-                data = pickle.load(f)
-                self.known_emails = data["names"]  # These are emails
-                self.known_encodings = data["encodings"]
-                self.image_counts = data.get("image_counts", {})
-                
-                print(f"✅ Loaded {len(self.known_emails)} student encodings")
-                
+            st = os.stat(self.map_path)
+            map_version = (st.st_mtime_ns, st.st_size)
         except FileNotFoundError:
-            raise Exception("No trained model found. Run train_model.py first")
+            map_version = None
+        return (self.store.stat_version(), map_version)
+
+    def load_gallery(self):
+        version = self.current_version()
+        known_emails, known_encodings, image_counts, store_version = self.load_encodings()
+        student_map = self.load_student_map()
+        self.validate_mapping(known_emails, student_map)
+
+        load_index = None
+        if self.ANN_MIN_GALLERY and len(known_emails) >= self.ANN_MIN_GALLERY:
+            def load_index():
+                return self.load_index(known_emails, known_encodings, store_version)
+
+        def load_codes():
+            return self.load_quantized(known_encodings, store_version)
+
+        return Gallery(known_emails, known_encodings, image_counts, student_map, version,
+                       load_index, store_version, self.GALLERY_PRECISION, self.GALLERY_RERANK,
+                       load_codes if store_version is not None else None)
+
+    def load_quantized(self, known_encodings, store_version):
+        """The int8 codes persisted for this gallery version, writing them if there are none.
+
+        Memory-mapped like the gallery itself, so all workers share one copy.
+        """
+        path = self.store.quantized_path(store_version)
+        with self.store.lock():
+            if path.exists():
+                try:
+                    return load_quantized(path)
+                except Exception as e:
+                    print(f"⚠️  Rebuilding unreadable int8 codes {path.name}: {str(e)}")
+
+            save_quantized(path, quantize(known_encodings))
+            print(f"🗜  Quantized gallery v{store_version} to int8")
+            return load_quantized(path)
+
+    def load_index(self, known_emails, known_encodings, store_version):
+        """The IVF index persisted for this gallery version, training it if there is none."""
+        path = self.store.index_path(store_version)
+        with self.store.lock():
+            if path.exists():
+                try:
+                    return IVFIndex.load(path, known_encodings, known_emails, self.ANN_NPROBE)
+                except Exception as e:
+                    print(f"⚠️  Rebuilding unreadable ANN index {path.name}: {str(e)}")
+
+            start = time.perf_counter()
+            index = IVFIndex.train(known_encodings, known_emails, nprobe=self.ANN_NPROBE)
+            index.save(path)
+            print(f"🗂  Built ANN index: {len(index.centroids)} lists, nprobe {index.nprobe} "
+                  f"({(time.perf_counter() - start):.1f}s)")
+            return index
+
+    def reload_if_changed(self):
+        """Swap in a fresh gallery if the files on disk changed since the last load."""
+        if self.current_version() == self.gallery.version:
+            return False
+
+        with self._reload_lock:
+            # Another thread may have reloaded while we waited
+            if self.current_version() == self.gallery.version:
+                return False
+            try:
+                gallery = self.load_gallery()
+            except Exception as e:
+                # Training may still be writing; keep serving the old snapshot
+                print(f"⚠️  Gallery reload failed, keeping previous version: {str(e)}")
+                return False
+            self.gallery = gallery
+            print(f"🔄 Reloaded gallery ({len(set(gallery.known_emails))} students)")
+            return True
+
+    def load_encodings(self):
+        if not self.store.exists():
+            # Start empty so online enrollment can create the first version
+            print("⚠️  No trained model found. Run train_model.py first")
+            return [], np.empty((0, 128), dtype=np.float32), {}, None
+
+        known_emails, known_encodings, image_counts, meta = self.store.load()
+        students = len(set(known_emails))
+        prototypes = f", {len(known_emails)} prototypes" if len(known_emails) > students else ""
+        print(f"✅ Loaded {students} student encodings{prototypes} (gallery v{meta['version']})")
+        return known_emails, known_encodings, image_counts, meta["version"]
 
     def load_student_map(self):
-        map_path = self.BASE_DIR / "student_map.json"
         try:
-            with open(map_path) as f:
-                self.student_map = json.load(f)
+            with open(self.map_path) as f:
+                return json.load(f)
         except FileNotFoundError:
-            self.student_map = {}
+            return {}
+
+    def enroll(self, email, encoding, student_info):
+        """Add or update one student in the live gallery without a retrain.
+
+        `encoding` is one vector or several prototypes; they replace any the
+        student already had.
+
+        The map entry and embedding are persisted to the same store training
+        writes, then this process swaps in the new gallery immediately; other
+        workers pick it up on their next request via the version check.
+        """
+        with self.store.lock():
+            # No one else can publish while we hold the lock; catch up with
+            # whatever another worker published since this one last loaded,
+            # so the index carried over below matches the store's rows
+            self.reload_if_changed()
+            published = self.store.read_meta()["version"] if self.store.exists() else None
 
-    def validate_mapping(self):
+            student_map = self.load_student_map()
+            student_map[email] = student_info
+            self.save_student_map(student_map)
+
+            version = self.store.upsert(email, encoding)
+            self.carry_index(email, published, version)
+
+        self.reload_if_changed()
+        print(f"➕ Enrolled {student_info.get('name', email)} (gallery v{version})")
+        return version
+
+    def unenroll(self, email):
+        """Remove one student from the live gallery and the map; undoes enroll()."""
+        with self.store.lock():
+            self.reload_if_changed()
+            published = self.store.read_meta()["version"] if self.store.exists() else None
+
+            student_map = self.load_student_map()
+            if student_map.pop(email, None) is not None:
+                self.save_student_map(student_map)
+
+            version = self.store.remove(email)
+            if version is not None:
+                self.carry_index(email, published, version)
+
+        self.reload_if_changed()
+        print(f"➖ Unenrolled {email}")
+        return version
+
+    def save_student_map(self, student_map):
+        tmp_map = self.map_path.with_name(self.map_path.name + ".tmp")
+        with open(tmp_map, "w") as f:
+            json.dump(student_map, f, indent=2)
+        os.replace(tmp_map, self.map_path)
+
+    def carry_index(self, email, published, version):
+        """Carry the ANN index over to a version that only changed `email`'s rows.
+
+        Saves retraining it: the store kept everyone else's rows in order and
+        appended this student's, if any. Only done if this process has loaded
+        the index of the `published` version it started from; otherwise the
+        first whole-gallery match of the new version trains one.
+        """
+        previous = self.gallery.loaded_matcher
+        if isinstance(previous, IVFIndex) and self.gallery.store_version == published:
+            emails, embeddings, _, _ = self.store.load()
+            kept = [i for i, e in enumerate(previous.row_labels) if e != email]
+            previous_rows = kept + [-1] * (len(emails) - len(kept))
+            previous.updated(embeddings, emails, previous_rows).save(self.store.index_path(version))
+
+    def validate_mapping(self, known_emails, student_map):
         missing = []
-        for email in self.known_emails:
-            if email not in self.student_map:
+        for email in dict.fromkeys(known_emails):
+            if email not in student_map:
                 missing.append(email)
         if missing:
             print(f"⚠️  Warning: Missing mappings for {len(missing)} students")
 
-    def recognize_students(self, image_path):
+    def detect_faces(self, image, detection=None, timings=None):
+        """Find face boxes on a downscaled copy and map them back to full resolution.
+
+        HOG/CNN cost grows with pixel count, so detecting on a 1024px copy of a
+        12MP photo is an order of magnitude cheaper; the boxes are then scaled
+        back so encoding can run on the full-resolution crops.
+        """
+        config = dict(self.DEFAULT_DETECTION, **(detection or {}))
+        height, width = image.shape[:2]
+        max_side = config["max_side"]
+        scale = min(1.0, max_side / max(height, width)) if max_side else 1.0
+
+        start = time.perf_counter()
+        if scale < 1.0:
+            small = cv2.resize(
+                image,
+                (max(1, round(width * scale)), max(1, round(height * scale))),
+                interpolation=cv2.INTER_AREA
+            )
+        else:
+            small = image
+        resize_ms = (time.perf_counter() - start) * 1000
+
+        import face_recognition
+
+        start = time.perf_counter()
+        small_locations = face_recognition.face_locations(
+            small,
+            number_of_times_to_upsample=config["upsample"],
+            model=config["model"]
+        )
+        detect_ms = (time.perf_counter() - start) * 1000
+
+        locations = [
+            (
+                max(0, int(round(top / scale))),
+                min(width, int(round(right / scale))),
+                min(height, int(round(bottom / scale))),
+                max(0, int(round(left / scale)))
+            )
+            for top, right, bottom, left in small_locations
+        ]
+
+        if timings is not None:
+            timings["resize_ms"] = round(resize_ms, 1)
+            timings["detect_ms"] = round(detect_ms, 1)
+            timings["detect_scale"] = round(scale, 4)
+            # Detection cost is ~linear in pixels, so full resolution would
+            # have taken about detect_ms / scale^2
+            timings["detect_saved_ms_estimate"] = round(detect_ms / (scale * scale) - detect_ms - resize_ms, 1)
+            timings["detection"] = config
+
+        return locations
+
+    def recognize_students(self, image, top_k=1, detection=None, timings=None, roster=None):
+        """Detect faces in the image and match them all against the gallery in one batch.
+
+        `image` is a path, raw bytes, a file-like upload or a decoded RGB array.
+        `roster` (a frozenset of emails) limits matching to those students.
+
+        With top_k > 1 each result also carries its nearest `top_k` candidates.
+        `detection` overrides DEFAULT_DETECTION; if `timings` is a dict it is
+        filled with per-stage timings in milliseconds.
+        """
+        import face_recognition
+
         try:
-            unknown_image = face_recognition.load_image_file(image_path)
-            face_locations = face_recognition.face_locations(unknown_image)
+            self.reload_if_changed()
+            # Pin one snapshot for the whole request
+            gallery = self.gallery
+            timings = timings if timings is not None else {}
+
+            start = time.perf_counter()
+            unknown_image = image if isinstance(image, np.ndarray) else load_image(image)
+            timings["load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+            face_locations = self.detect_faces(unknown_image, detection, timings)
+
+            start = time.perf_counter()
             face_encodings = face_recognition.face_encodings(unknown_image, face_locations)
-            
+            timings["encode_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
             print(f"🔍 Found {len(face_encodings)} faces in the image")
-           
-            results = []
-            for encoding, location in zip(face_encodings, face_locations):
-                matches = face_recognition.compare_faces(self.known_encodings, encoding, tolerance=0.6)
-                face_distances = face_recognition.face_distance(self.known_encodings, encoding)
-                
-                if len(face_distances) > 0:
-                    best_match_idx = np.argmin(face_distances)
-                   
-                    if matches[best_match_idx]:
-                        student_email = self.known_emails[best_match_idx]
-                        student_info = self.student_map.get(student_email)
-                       
-                        if student_info:
-                            confidence = round((1 - face_distances[best_match_idx]) * 100, 2)
-                            
-                            results.append({
-                                "student": student_info.get("name", "Unknown"),
-                                "email": student_email,
-                                "roll": student_info.get("roll_number", "Unknown"),
-                                "department": student_info.get("department", "Unknown"),
-                                "confidence": confidence,
-                                "location": {
-                                    "top": location[0],
-                                    "right": location[1],
-                                    "bottom": location[2],
-                                    "left": location[3]
-                                }
-                            })
-                            print(f"✅ Recognized: {student_info.get('name')} ({confidence}%)")
-                        else:
-                            print(f"⚠️  No mapping for email: {student_email}")
-                    else:
-                        print("❌ No match found for a face")
-                else:
-                    print("❌ No face distances calculated")
-       
+
+            matches = self.match_faces(gallery, face_encodings, face_locations, top_k, timings, roster)
+            results = [m for m in matches if m is not None]
+
             return sorted(results, key=lambda x: x["confidence"], reverse=True)
-            
+
         except Exception as e:
             print(f"❌ Face recognition error: {str(e)}")
-            raise e
\ No newline at end of file
+            raise e
+
+    def match_faces(self, gallery, face_encodings, face_locations, top_k=1, timings=None, roster=None):
+        """Match encodings against a pinned gallery snapshot in one batch.
+
+        With a `roster`, only those students are candidates. Returns one entry
+        per face, in input order: a result dict, or None if the face matched
+        no one within TOLERANCE.
+        """
+        if len(face_encodings) == 0:
+            return []
+
+        matcher = gallery.matcher_for(roster)
+        if timings is not None:
+            timings["match_candidates"] = len(matcher)
+
+        if len(matcher) == 0:
+            print("❌ No face distances calculated")
+            return [None] * len(face_encodings)
+
+        start = time.perf_counter()
+        cand_idx, cand_dist = matcher.top_k(face_encodings, k=max(top_k, 1))
+        if timings is not None:
+            timings["match_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        matches = []
+        for location, idx_row, dist_row in zip(face_locations, cand_idx, cand_dist):
+            best_distance = dist_row[0]
+
+            if best_distance > self.TOLERANCE:
+                print("❌ No match found for a face")
+                matches.append(None)
+                continue
+
+            student_email = matcher.labels[idx_row[0]]
+            student_info = gallery.student_map.get(student_email)
+
+            if not student_info:
+                print(f"⚠️  No mapping for email: {student_email}")
+                matches.append(None)
+                continue
+
+            confidence = round((1 - float(best_distance)) * 100, 2)
+
+            result = {
+                "student": student_info.get("name", "Unknown"),
+                "email": student_email,
+                "roll": student_info.get("roll_number", "Unknown"),
+                "department": student_info.get("department", "Unknown"),
+                "confidence": confidence,
+                "location": {
+                    "top": location[0],
+                    "right": location[1],
+                    "bottom": location[2],
+                    "left": location[3]
+                }
+            }
+            if top_k > 1:
+                result["candidates"] = [
+                    {
+                        "email": matcher.labels[i],
+                        "confidence": round((1 - float(d)) * 100, 2)
+                    }
+                    for i, d in zip(idx_row, dist_row)
+                ]
+            matches.append(result)
+            print(f"✅ Recognized: {student_info.get('name')} ({confidence}%)")
+
+        return matches
+
+
+def merge_detections(results_per_photo):
+    """Merge recognition results of several photos of the same class.
+
+    Overlapping shots show the same student more than once; keep the
+    best-confidence detection per student and record which photo it came
+    from and in how many photos the student was seen.
+    """
+    best = {}
+    seen_in = {}
+    for photo_index, results in enumerate(results_per_photo):
+        for result in results:
+            email = result["email"]
+            seen_in.setdefault(email, set()).add(photo_index)
+            if email not in best or result["confidence"] > best[email]["confidence"]:
+                best[email] = dict(result, photo=photo_index)
+
+    for email, result in best.items():
+        result["seen_in_photos"] = len(seen_in[email])
+
+    return sorted(best.values(), key=lambda x: x["confidence"], reverse=True)
+
+
+# -------------------- WORKER PROCESSES --------------------
+# Entry points for utils.jobs.JobQueue; each pool process keeps its own
+# long-lived recognizer (the gallery itself is memory-mapped and shared).
+
+_worker_recognizer = None
+
+
+def share_with_workers(recognizer):
+    """Let pool processes forked from this one reuse `recognizer` instead of loading their own."""
+    global _worker_recognizer
+    _worker_recognizer = recognizer
+
+
+def init_worker():
+    global _worker_recognizer
+    if _worker_recognizer is None:
+        _worker_recognizer = FaceRecognizer()
+    else:
+        _worker_recognizer.after_fork()
+
+
+def recognize_in_worker(image_bytes, detection=None, roster=None):
+    timings = {}
+    results = _worker_recognizer.recognize_students(
+        image_bytes, detection=detection, timings=timings, roster=roster
+    )
+    return {"results": results, "timings": timings}
+
+
+def recognize_video_in_worker(source, detection=None, sample_fps=2, max_frames=None, roster=None):
+    """`source` is a video file path or a list of encoded frame images, in order."""
+    if isinstance(source, (str, Path)):
+        frames = iter_video_frames(source, sample_fps, max_frames)
+    else:
+        frames = ((i, load_image(data)) for i, data in enumerate(source[:max_frames]))
+    return recognize_frames(_worker_recognizer, frames, detection, roster=roster)
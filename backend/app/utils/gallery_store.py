@@ -0,0 +1,240 @@
+# backend/app/utils/gallery_store.py
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking
+    fcntl = None
+
+import numpy as np
+
+from .matcher import ENCODING_DIM
+
+
+class GalleryStore:
+    """Versioned on-disk gallery: a float32 .npy matrix, an id index and a metadata header.
+
+    Layout of the store directory:
+
+        meta.json              header; the single source of truth for the live version
+        embeddings-<v>.npy     float32 (N x 128) matrix, opened with mmap so worker
+                               processes share the same read-only pages
+        ids-<v>.json           row -> student email, plus per-student image counts; a
+                               student with several prototypes has consecutive rows
+        ivf-<v>.npz            optional ANN partitions for version v (large galleries)
+        q8-<v>.npz             optional int8 codes of version v (GALLERY_PRECISION "int8")
+
+    Data files are written under a fresh version number first and published by
+    atomically replacing meta.json, so a reader always sees a complete version.
+    """
+
+    FORMAT = "face-gallery"
+    FORMAT_VERSION = 1
+    META_NAME = "meta.json"
+    LOCK_NAME = ".lock"
+
+    _thread_lock = threading.RLock()
+    _held = threading.local()
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.meta_path = self.directory / self.META_NAME
+
+    @contextmanager
+    def lock(self):
+        """Exclusive writer lock, shared by threads and processes (training, enrollment).
+
+        Re-entrant within a thread, so callers can hold it across a store write.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._thread_lock:
+            depth = getattr(self._held, "depth", 0)
+            if fcntl is None or depth:
+                self._held.depth = depth + 1
+                try:
+                    yield
+                finally:
+                    self._held.depth = depth
+                return
+            with open(self.directory / self.LOCK_NAME, "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                self._held.depth = 1
+                try:
+                    yield
+                finally:
+                    self._held.depth = 0
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    @classmethod
+    def after_fork(cls):
+        """Reset the in-process lock state in a forked child.
+
+        A thread of the parent may have held it at fork time and does not
+        exist in the child. The flock itself belongs to the parent's open
+        file, which that thread still unlocks.
+        """
+        cls._thread_lock = threading.RLock()
+        cls._held = threading.local()
+
+    def index_path(self, version):
+        """Where the IVF index for a gallery version is kept (it may not exist)."""
+        return self.directory / f"ivf-{version}.npz"
+
+    def quantized_path(self, version):
+        """Where the int8 codes for a gallery version are kept (they may not exist)."""
+        return self.directory / f"q8-{version}.npz"
+
+    def exists(self):
+        return self.meta_path.exists()
+
+    def stat_version(self):
+        """Cheap change token for hot reload: (mtime_ns, size) of meta.json, or None."""
+        try:
+            st = os.stat(self.meta_path)
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def read_meta(self):
+        with open(self.meta_path) as f:
+            meta = json.load(f)
+        if meta.get("format") != self.FORMAT:
+            raise Exception(f"{self.meta_path} is not a gallery header")
+        if meta.get("format_version") != self.FORMAT_VERSION:
+            raise Exception(
+                f"Unsupported gallery format version {meta.get('format_version')} "
+                f"(expected {self.FORMAT_VERSION}). Re-run train_model.py"
+            )
+        return meta
+
+    def load(self, mmap=True):
+        """Return (emails, embeddings, image_counts, meta) for the published version."""
+        meta = self.read_meta()
+
+        embeddings = np.load(
+            self.directory / meta["embeddings"],
+            mmap_mode="r" if mmap else None,
+            allow_pickle=False
+        )
+        with open(self.directory / meta["index"]) as f:
+            index = json.load(f)
+
+        emails = index["emails"]
+        if embeddings.shape != (len(emails), meta["dim"]):
+            raise Exception(
+                f"Gallery version {meta['version']} is inconsistent: "
+                f"{embeddings.shape} embeddings for {len(emails)} ids"
+            )
+        return emails, embeddings, index.get("image_counts", {}), meta
+
+    def save(self, emails, embeddings, image_counts=None):
+        """Write a new version and publish it. Returns the new version number."""
+        with self.lock():
+            return self._save(emails, embeddings, image_counts)
+
+    def upsert(self, email, encodings, image_count=1):
+        """Replace one student's embedding(s) and publish a new version.
+
+        `encodings` is one vector or a (prototypes x 128) matrix. The
+        student's old rows are dropped and the new ones appended, keeping
+        the order of everyone else. Used for online enrollment; the existing
+        rows are copied once into the new version file, the live version
+        stays readable throughout.
+        """
+        with self.lock():
+            if self.exists():
+                emails, embeddings, image_counts, _ = self.load(mmap=False)
+            else:
+                emails, embeddings, image_counts = [], np.empty((0, ENCODING_DIM), np.float32), {}
+
+            rows = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+            keep = [i for i, e in enumerate(emails) if e != email]
+            emails = [emails[i] for i in keep] + [email] * len(rows)
+            embeddings = np.vstack([embeddings[keep], rows])
+            image_counts[email] = image_count
+
+            return self._save(emails, embeddings, image_counts)
+
+    def remove(self, email):
+        """Drop one student's rows and publish a new version; None if they had none."""
+        with self.lock():
+            if not self.exists():
+                return None
+            emails, embeddings, image_counts, _ = self.load(mmap=False)
+            keep = [i for i, e in enumerate(emails) if e != email]
+            if len(keep) == len(emails):
+                return None
+            image_counts.pop(email, None)
+            return self._save([emails[i] for i in keep], embeddings[keep], image_counts)
+
+    def _save(self, emails, embeddings, image_counts):
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(emails), ENCODING_DIM)
+
+        previous = self.read_meta() if self.exists() else None
+        version = previous["version"] + 1 if previous else 1
+
+        embeddings_name = f"embeddings-{version}.npy"
+        index_name = f"ids-{version}.json"
+
+        tmp = self.directory / f"{embeddings_name}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix), allow_pickle=False)
+        os.replace(tmp, self.directory / embeddings_name)
+
+        self._write_json(self.directory / index_name, {
+            "emails": list(emails),
+            "image_counts": image_counts or {}
+        })
+
+        self._write_json(self.meta_path, {
+            "format": self.FORMAT,
+            "format_version": self.FORMAT_VERSION,
+            "version": version,
+            "dim": ENCODING_DIM,
+            "dtype": "float32",
+            "count": len(emails),
+            "embeddings": embeddings_name,
+            "index": index_name,
+            "created_at": datetime.utcnow().isoformat(timespec="seconds")
+        })
+
+        self._remove_stale(keep={version, previous["version"] if previous else version})
+        return version
+
+    def _write_json(self, path, data):
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+
+    def _remove_stale(self, keep):
+        # Keep the previous version too: a reader may have read the old header
+        # just before the swap and not opened its data files yet.
+        for path in self.directory.glob("*-*.*"):
+            stem = path.name.split(".")[0]
+            prefix, _, number = stem.rpartition("-")
+            if prefix in ("embeddings", "ids", "ivf", "q8") and number.isdigit() and int(number) not in keep:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=GalleryStore.after_fork)
+
+
+def migrate_legacy_pickle(pickle_path, store):
+    """Convert an old encodings.pkl (names / encodings / image_counts) into the store."""
+    import pickle
+
+    with open(pickle_path, "rb") as f:
+        data = pickle.load(f)
+    return store.save(data["names"], data["encodings"], data.get("image_counts", {}))
@@ -0,0 +1,182 @@
+# backend/app/utils/jobs.py
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class QueueFull(Exception):
+    """The job queue is at capacity; the client should retry later."""
+
+
+class JobQueue:
+    """Bounded local job queue on a process pool, with pollable job status.
+
+    Up to `max_pending` jobs may be queued or running at once; submit()
+    raises QueueFull beyond that instead of letting work pile up. Finished
+    jobs are kept for `job_ttl` seconds so clients can collect the result.
+
+    The pool is created lazily on first submit, so a pre-fork server creates
+    it in each worker after the fork rather than sharing one across workers.
+    """
+
+    def __init__(self, workers=None, max_pending=None, initializer=None, job_ttl=600):
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.max_pending = max_pending or self.workers * 4
+        self.initializer = initializer
+        self.job_ttl = job_ttl
+
+        self._pool = None
+        self._pool_pid = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def _get_pool(self):
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer)
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def submit(self, fn, *args, owner=None, on_done=None, cleanup=None):
+        """Queue fn(*args) on the pool and return a job id.
+
+        on_done(result) runs in this process once fn finishes; its return
+        value becomes the job's result. Raises QueueFull when at capacity.
+        """
+        return self.submit_many(
+            fn, [args], owner=owner,
+            on_done=lambda results: on_done(results[0]) if on_done else results[0],
+            cleanup=cleanup
+        )
+
+    def submit_many(self, fn, arg_list, owner=None, on_done=None, cleanup=None):
+        """Queue fn(*args) for every args in arg_list as one job; they run concurrently.
+
+        on_done(results) receives the results in arg_list order once all have
+        succeeded. cleanup() runs once the job is over, whether it succeeded
+        or failed (on_done is skipped when a task raises). Each task takes
+        one queue slot; raises QueueFull if there are not enough free slots
+        for all of them.
+        """
+        taken = 0
+        for _ in arg_list:
+            if not self._slots.acquire(blocking=False):
+                for _ in range(taken):
+                    self._slots.release()
+                raise QueueFull(f"Recognition queue is full ({self.max_pending} jobs)")
+            taken += 1
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "owner": owner,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "finished_at": None,
+            "done": threading.Event(),
+            "futures": []
+        }
+
+        with self._lock:
+            self._expire()
+            self._jobs[job_id] = job
+            try:
+                pool = self._get_pool()
+                for args in arg_list:
+                    job["futures"].append(pool.submit(fn, *args))
+            except Exception as e:
+                del self._jobs[job_id]
+                if isinstance(e, BrokenProcessPool):
+                    # Start a fresh pool on the next submit
+                    self._pool = None
+                self._abandon(job_id, job["futures"], taken, cleanup)
+                raise
+
+        remaining = [len(arg_list)]
+        remaining_lock = threading.Lock()
+
+        def finish(future):
+            self._slots.release()
+            with remaining_lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            try:
+                results = [f.result() for f in job["futures"]]
+                job["result"] = on_done(results) if on_done else results
+                job["status"] = "done"
+            except Exception as e:
+                job["error"] = str(e)
+                job["status"] = "failed"
+            finally:
+                self._cleanup(job_id, cleanup)
+                job["finished_at"] = time.time()
+                job["done"].set()
+
+        for future in list(job["futures"]):
+            future.add_done_callback(finish)
+        return job_id
+
+    def _abandon(self, job_id, futures, taken, cleanup):
+        """Undo a partly submitted job.
+
+        Tasks that have not started are cancelled and their slots freed
+        now. Any that already run keep their slot until they stop, and
+        cleanup() runs once the last of them has.
+        """
+        running = [f for f in futures if not f.cancel()]
+        for _ in range(taken - len(running)):
+            self._slots.release()
+        if not running:
+            self._cleanup(job_id, cleanup)
+            return
+
+        remaining = [len(running)]
+        remaining_lock = threading.Lock()
+
+        def stopped(future):
+            self._slots.release()
+            with remaining_lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            self._cleanup(job_id, cleanup)
+
+        for future in running:
+            future.add_done_callback(stopped)
+
+    def _cleanup(self, job_id, cleanup):
+        if cleanup:
+            try:
+                cleanup()
+            except Exception as e:
+                print(f"⚠️  Job {job_id} cleanup failed: {str(e)}")
+
+    def get(self, job_id, wait=0):
+        """Job snapshot (without internals), optionally blocking up to `wait` seconds."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if wait and not job["done"].is_set():
+            job["done"].wait(wait)
+        snapshot = {k: v for k, v in job.items() if k not in ("done", "futures")}
+        if snapshot["status"] == "queued" and any(f.running() or f.done() for f in job["futures"]):
+            snapshot["status"] = "running"
+        return snapshot
+
+    def stats(self):
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if not j["done"].is_set())
+        return {"workers": self.workers, "max_pending": self.max_pending, "active": active}
+
+    def _expire(self):
+        cutoff = time.time() - self.job_ttl
+        for job_id in [j for j, job in self._jobs.items()
+                       if job["finished_at"] and job["finished_at"] < cutoff]:
+            del self._jobs[job_id]
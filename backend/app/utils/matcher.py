@@ -0,0 +1,277 @@
+# backend/app/utils/matcher.py
+import os
+from pathlib import Path
+
+import numpy as np
+
+ENCODING_DIM = 128
+
+
+def group_labels(row_labels):
+    """(labels, row_ids): distinct labels in first-seen order and each row's position in them."""
+    first = {}
+    row_ids = np.fromiter(
+        (first.setdefault(label, len(first)) for label in row_labels),
+        dtype=np.int64, count=len(row_labels)
+    )
+    return list(first), row_ids
+
+
+class FaceMatcher:
+    """Batched nearest-neighbour matching of face encodings against a gallery.
+
+    The gallery is held as one contiguous (N x 128) matrix with its squared
+    row norms precomputed, so all faces of a photo are scored against all
+    students with a single matrix product:
+
+        ||q - g||^2 = ||q||^2 + ||g||^2 - 2 q.g
+
+    A student may have several rows (prototypes); `labels` are the distinct
+    students and a student's distance is that of their nearest prototype,
+    reduced per student inside the same batched computation.
+    """
+
+    def __init__(self, encodings, labels):
+        self.row_labels = list(labels)
+        self.labels, row_ids = group_labels(self.row_labels)
+        # float32 galleries (e.g. memory-mapped from the store) are used as-is,
+        # without a per-process float64 copy
+        matrix = np.asarray(encodings)
+        if matrix.dtype != np.float32:
+            matrix = matrix.astype(np.float64)
+        matrix = matrix.reshape(len(self.row_labels), ENCODING_DIM)
+
+        # Each student's prototypes as one contiguous run of columns
+        # (the store already writes them that way, so normally no copy)
+        self.starts = None
+        if len(self.labels) < len(self.row_labels):
+            if np.any(row_ids[1:] < row_ids[:-1]):
+                order = np.argsort(row_ids, kind="stable")
+                matrix, row_ids = matrix[order], row_ids[order]
+            self.starts = np.flatnonzero(np.r_[True, row_ids[1:] != row_ids[:-1]])
+
+        self.matrix = np.ascontiguousarray(matrix)
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def distances(self, face_encodings):
+        """Euclidean distance of every face to every student, shape (F, len(labels))."""
+        queries = np.asarray(face_encodings, dtype=self.matrix.dtype).reshape(-1, ENCODING_DIM)
+        q_norms = np.einsum("ij,ij->i", queries, queries)
+
+        d2 = queries @ self.matrix.T
+        d2 *= -2
+        d2 += q_norms[:, None]
+        d2 += self.sq_norms[None, :]
+        if self.starts is not None:
+            # Nearest prototype per student
+            d2 = np.minimum.reduceat(d2, self.starts, axis=1)
+        # Rounding can push near-identical vectors slightly below zero
+        np.maximum(d2, 0, out=d2)
+        return np.sqrt(d2, out=d2)
+
+    def top_k(self, face_encodings, k=1):
+        """Return (indices into labels, distances), each (F, k), nearest first.
+
+        k is clipped to the number of students.
+        """
+        n_faces = len(face_encodings)
+        k = min(k, len(self))
+        if n_faces == 0 or k == 0:
+            return np.empty((n_faces, 0), dtype=np.intp), np.empty((n_faces, 0))
+
+        dist = self.distances(face_encodings)
+        if k < dist.shape[1]:
+            idx = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        else:
+            idx = np.broadcast_to(np.arange(dist.shape[1]), dist.shape).copy()
+
+        part = np.take_along_axis(dist, idx, axis=1)
+        order = np.argsort(part, axis=1)
+        idx = np.take_along_axis(idx, order, axis=1)
+        return idx, np.take_along_axis(part, order, axis=1)
+
+
+def quantize(matrix, block_rows=65536):
+    """Per-dimension int8 codes for a gallery: x ~= center + scale * code.
+
+    Each dimension gets its own range, so the 255 levels cover the values
+    that dimension actually takes. Reads `matrix` (e.g. the memory-mapped
+    store) a block at a time. Returns (codes, center, scale, code_norms),
+    code_norms being the squared norms of the dequantized rows.
+    """
+    matrix = np.asarray(matrix).reshape(-1, ENCODING_DIM)
+    n = len(matrix)
+    lo = np.full(ENCODING_DIM, np.inf, dtype=np.float32)
+    hi = np.full(ENCODING_DIM, -np.inf, dtype=np.float32)
+    for start in range(0, n, block_rows):
+        block = np.asarray(matrix[start:start + block_rows], dtype=np.float32)
+        lo = np.minimum(lo, block.min(axis=0))
+        hi = np.maximum(hi, block.max(axis=0))
+    if n == 0:
+        lo = hi = np.zeros(ENCODING_DIM, dtype=np.float32)
+    center = (lo + hi) / 2
+    scale = np.maximum((hi - lo) / 254, np.float32(1e-12))
+
+    codes = np.empty((n, ENCODING_DIM), dtype=np.int8)
+    code_norms = np.empty(n, dtype=np.float32)
+    for start in range(0, n, block_rows):
+        block = (np.asarray(matrix[start:start + block_rows], dtype=np.float32) - center) / scale
+        block = np.clip(np.rint(block), -127, 127)
+        codes[start:start + len(block)] = block
+        values = center + scale * block
+        code_norms[start:start + len(block)] = np.einsum("ij,ij->i", values, values)
+    return codes, center, scale, code_norms
+
+
+def save_quantized(path, quantized):
+    """Write (codes, center, scale, code_norms): the codes as .codes.npy, the rest as .npz, atomically."""
+    codes, center, scale, code_norms = quantized
+    path = Path(path)
+    for target, write in (
+        (path.with_suffix(".codes.npy"), lambda f: np.save(f, codes, allow_pickle=False)),
+        (path, lambda f: np.savez(f, center=center, scale=scale, code_norms=code_norms))
+    ):
+        tmp = target.with_name(target.name + ".tmp")
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, target)
+
+
+def load_quantized(path):
+    """(codes, center, scale, code_norms) written by save_quantized; the codes are memory-mapped."""
+    path = Path(path)
+    with np.load(path, allow_pickle=False) as data:
+        center, scale, code_norms = data["center"], data["scale"], data["code_norms"]
+    codes = np.load(path.with_suffix(".codes.npy"), mmap_mode="r", allow_pickle=False)
+    return codes, center, scale, code_norms
+
+
+class QuantizedMatcher:
+    """Matches against int8 codes of the gallery and re-ranks in float64.
+
+    Every query scans only the codes (1 byte per value). The full-precision
+    `encodings` - the memory-mapped float32 store - are never copied or
+    scanned; only the rows of each face's `rerank` best students are read
+    from them. `rows` limits the matcher to those gallery rows (a roster),
+    with `labels` and `quantized` (from quantize()) given for those rows
+    only. Same interface as FaceMatcher.
+    """
+
+    # int8 rows widened to float32 per block; small enough to stay in cache
+    BLOCK_ROWS = 2048
+
+    def __init__(self, encodings, labels, rerank=8, rows=None, quantized=None):
+        self.row_labels = list(labels)
+        self.labels, row_ids = group_labels(self.row_labels)
+        self.rerank = rerank
+        self.source = encodings
+        self.rows = np.arange(len(self.row_labels)) if rows is None else np.asarray(rows, dtype=np.int64)
+        if quantized is None:
+            quantized = quantize(np.take(encodings, self.rows, axis=0) if rows is not None else encodings)
+        self.codes, self.center, self.scale, self.code_norms = quantized
+
+        # Each student's codes as one contiguous run (the store writes them
+        # that way, so normally no reordering)
+        self.starts = self.ends = None
+        if len(self.labels) < len(self.row_labels):
+            if np.any(row_ids[1:] < row_ids[:-1]):
+                order = np.argsort(row_ids, kind="stable")
+                row_ids, self.rows = row_ids[order], self.rows[order]
+                self.codes, self.code_norms = self.codes[order], self.code_norms[order]
+            self.starts = np.flatnonzero(np.r_[True, row_ids[1:] != row_ids[:-1]])
+            self.ends = np.r_[self.starts[1:], len(row_ids)]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _scores(self, queries):
+        """||x||^2 - 2 q.x per student from the codes: the squared distance less ||q||^2.
+
+        That term is the same for every student of a face, so it does not
+        change the ranking and the shortlist is taken from these directly.
+        q.x = q.center + (q * scale).code, so the codes are multiplied as
+        they are, a block at a time, without dequantizing the gallery.
+        """
+        weighted = queries * (-2 * self.scale)
+        scores = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), self.BLOCK_ROWS):
+            block = self.codes[start:start + self.BLOCK_ROWS].astype(np.float32)
+            np.matmul(weighted, block.T, out=scores[:, start:start + len(block)])
+        scores += self.code_norms[None, :]
+        if self.starts is not None:
+            scores = np.minimum.reduceat(scores, self.starts, axis=1)
+        return scores
+
+    def approximate_distances(self, face_encodings):
+        """Squared distances per student computed from the int8 codes, shape (F, len(labels))."""
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        d2 = self._scores(queries)
+        d2 += (np.einsum("ij,ij->i", queries, queries) - 2 * (queries @ self.center))[:, None]
+        return d2
+
+    def _exact(self, query, students):
+        """float64 distance of one face to each of the given students (a handful of rows)."""
+        if self.starts is None:
+            positions = students
+            segments = None
+        else:
+            lengths = self.ends[students] - self.starts[students]
+            positions = np.concatenate([np.arange(self.starts[s], self.ends[s]) for s in students])
+            segments = np.r_[0, np.cumsum(lengths)[:-1]]
+
+        values = np.asarray(self.source[self.rows[positions]], dtype=np.float64)
+        d2 = np.einsum("ij,ij->i", values, values) - 2 * values @ query + query @ query
+        if segments is not None:
+            d2 = np.minimum.reduceat(d2, segments)
+        return np.sqrt(np.maximum(d2, 0))
+
+    def distances(self, face_encodings):
+        """Approximate (int8) distance of every face to every student."""
+        return np.sqrt(np.maximum(self.approximate_distances(face_encodings), 0))
+
+    def top_k(self, face_encodings, k=1):
+        """Shortlist max(k, rerank) students per face from the codes, return the exact top k."""
+        n_faces = len(face_encodings)
+        k = min(k, len(self))
+        if n_faces == 0 or k == 0:
+            return np.empty((n_faces, 0), dtype=np.intp), np.empty((n_faces, 0))
+
+        queries = np.asarray(face_encodings, dtype=np.float64).reshape(-1, ENCODING_DIM)
+        scores = self._scores(queries.astype(np.float32))
+        shortlist = min(max(k, self.rerank), len(self))
+        if shortlist < scores.shape[1]:
+            candidates = np.argpartition(scores, shortlist - 1, axis=1)[:, :shortlist]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+
+        out_idx = np.empty((n_faces, k), dtype=np.intp)
+        out_dist = np.empty((n_faces, k))
+        for f in range(n_faces):
+            exact = self._exact(queries[f], candidates[f])
+            best = np.argsort(exact)[:k]
+            out_idx[f] = candidates[f][best]
+            out_dist[f] = exact[best]
+        return out_idx, out_dist
+
+
+# Gallery representations FaceRecognizer can match against
+PRECISIONS = ("float64", "float32", "int8")
+
+
+def make_matcher(encodings, labels, precision="float32", rerank=8):
+    """FaceMatcher over the gallery at the given precision.
+
+    float32 uses the store's matrix as-is; float64 makes a double copy
+    (what face_recognition itself returns); int8 quantizes the gallery and
+    re-ranks the best `rerank` students against `encodings`.
+    """
+    if precision == "int8":
+        return QuantizedMatcher(encodings, labels, rerank)
+    if precision == "float64":
+        return FaceMatcher(np.asarray(encodings, dtype=np.float64), labels)
+    if precision == "float32":
+        return FaceMatcher(np.asarray(encodings, dtype=np.float32), labels)
+    raise ValueError(f"precision must be one of {', '.join(PRECISIONS)}")
@@ -0,0 +1,54 @@
+# backend/app/utils/query_counter.py
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Count the SQL statements an engine executes inside a `with` block.
+
+        with QueryCounter(db.engine) as counter:
+            client.get("/subjects", headers=...)
+        print(counter.count, counter.statements)
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.statements = []
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._before_execute)
+        return False
+
+
+class QueryCountGrew(AssertionError):
+    """An endpoint's query count depends on how many rows it returns (an N+1)."""
+
+
+def assert_constant_queries(engine, call, grow, label="call"):
+    """Fail if call() issues more queries after grow() has added more rows.
+
+    call() should exercise one endpoint; grow() should add rows it returns
+    (more subjects, more attendance, ...). With eager loading in place both
+    runs issue the same number of statements. Returns that number.
+    """
+    with QueryCounter(engine) as before:
+        call()
+    grow()
+    with QueryCounter(engine) as after:
+        call()
+
+    if after.count > before.count:
+        new = after.statements[before.count:]
+        raise QueryCountGrew(
+            f"{label}: {before.count} -> {after.count} queries as the result grew; "
+            f"statements past the first run's count:\n" + "\n".join(new[:3])
+        )
+    return after.count
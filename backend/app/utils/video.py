@@ -0,0 +1,197 @@
+# backend/app/utils/video.py
+import time
+
+import cv2
+
+
+def box_iou(a, b):
+    """Intersection over union of two (top, right, bottom, left) boxes."""
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    if bottom <= top or right <= left:
+        return 0.0
+    inter = (bottom - top) * (right - left)
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    return inter / float(area_a + area_b - inter)
+
+
+class FaceTrack:
+    def __init__(self, track_id, box, sample, frame_index):
+        self.id = track_id
+        self.box = box
+        self.first_frame = frame_index
+        self.last_sample = sample
+        self.frames_seen = 1
+        self.attempts = 0
+        self.match = None
+
+
+class FaceTracker:
+    """Attendance from a sequence of frames, encoding each tracked face only once.
+
+    Faces are detected on every sampled frame (on the downscaled copy, which
+    is cheap) and linked to existing tracks by box overlap. A track is
+    encoded and matched when it first appears; if that fails (blurred,
+    turned away) it is retried on later frames up to `max_attempts` times.
+    Once matched, a track is never encoded again, which is what keeps video
+    affordable compared with recognizing every frame.
+    """
+
+    def __init__(self, recognizer, detection=None, iou_threshold=0.3, max_missed=5, max_attempts=3,
+                 roster=None):
+        self.recognizer = recognizer
+        self.detection = detection
+        self.roster = roster
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed  # in sampled frames
+        self.max_attempts = max_attempts
+
+        recognizer.reload_if_changed()
+        # Pin one gallery snapshot for the whole video
+        self.gallery = recognizer.gallery
+
+        self.active = []
+        self.finished = []
+        self._next_id = 0
+        self.frames = 0
+        self.faces_detected = 0
+        self.faces_encoded = 0
+        self.timings = {"detect_ms": 0.0, "encode_ms": 0.0, "match_ms": 0.0}
+
+    def process_frame(self, frame, frame_index=None):
+        """Feed one RGB frame (numpy array); frame_index is only used for reporting."""
+        sample = self.frames
+        frame_index = sample if frame_index is None else frame_index
+        self.frames += 1
+
+        start = time.perf_counter()
+        boxes = self.recognizer.detect_faces(frame, self.detection)
+        self.timings["detect_ms"] += (time.perf_counter() - start) * 1000
+        self.faces_detected += len(boxes)
+
+        tracks = self._associate(boxes, sample, frame_index)
+
+        # Encode only new tracks and unresolved ones still worth retrying
+        pending = [t for t in tracks if t.match is None and t.attempts < self.max_attempts]
+        if pending:
+            import face_recognition
+
+            start = time.perf_counter()
+            encodings = face_recognition.face_encodings(frame, [t.box for t in pending])
+            self.timings["encode_ms"] += (time.perf_counter() - start) * 1000
+            self.faces_encoded += len(encodings)
+
+            start = time.perf_counter()
+            matches = self.recognizer.match_faces(
+                self.gallery, encodings, [t.box for t in pending], roster=self.roster
+            )
+            self.timings["match_ms"] += (time.perf_counter() - start) * 1000
+
+            for track, match in zip(pending, matches):
+                track.attempts += 1
+                track.match = match
+
+        # Retire tracks that have left the frame
+        still_active = []
+        for track in self.active:
+            if sample - track.last_sample > self.max_missed:
+                self.finished.append(track)
+            else:
+                still_active.append(track)
+        self.active = still_active
+
+    def _associate(self, boxes, sample, frame_index):
+        """Greedy IoU matching of this frame's boxes to active tracks."""
+        pairs = sorted(
+            ((box_iou(track.box, box), ti, bi)
+             for ti, track in enumerate(self.active)
+             for bi, box in enumerate(boxes)),
+            reverse=True
+        )
+        used_tracks, used_boxes = set(), set()
+        touched = []
+        for iou, ti, bi in pairs:
+            if iou < self.iou_threshold:
+                break
+            if ti in used_tracks or bi in used_boxes:
+                continue
+            used_tracks.add(ti)
+            used_boxes.add(bi)
+            track = self.active[ti]
+            track.box = boxes[bi]
+            track.last_sample = sample
+            track.frames_seen += 1
+            touched.append(track)
+
+        for bi, box in enumerate(boxes):
+            if bi not in used_boxes:
+                track = FaceTrack(self._next_id, box, sample, frame_index)
+                self._next_id += 1
+                self.active.append(track)
+                touched.append(track)
+
+        return touched
+
+    def result(self):
+        """One detection per student: the best-confidence track, with how long they were seen."""
+        best = {}
+        frames_seen = {}
+        for track in self.finished + self.active:
+            if track.match is None:
+                continue
+            email = track.match["email"]
+            frames_seen[email] = frames_seen.get(email, 0) + track.frames_seen
+            if email not in best or track.match["confidence"] > best[email]["confidence"]:
+                best[email] = dict(track.match, first_frame=track.first_frame)
+
+        for email, result in best.items():
+            result["frames_seen"] = frames_seen[email]
+
+        return sorted(best.values(), key=lambda x: x["confidence"], reverse=True)
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "tracks": self._next_id,
+            "faces_detected": self.faces_detected,
+            "faces_encoded": self.faces_encoded,
+            "timings": {k: round(v, 1) for k, v in self.timings.items()}
+        }
+
+
+def iter_video_frames(path, sample_fps=2, max_frames=None):
+    """Yield (frame_index, RGB frame) from a video file at about sample_fps frames per second."""
+    from .face_recognizer import InvalidVideo
+
+    capture = cv2.VideoCapture(str(path))
+    if not capture.isOpened():
+        raise InvalidVideo("Could not open video")
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 25
+        step = max(1, int(round(fps / sample_fps)))
+        index = 0
+        yielded = 0
+        while True:
+            # grab() without retrieve() skips converting frames we do not sample
+            if not capture.grab():
+                break
+            if index % step == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                yield index, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                yielded += 1
+                if max_frames and yielded >= max_frames:
+                    break
+            index += 1
+    finally:
+        capture.release()
+
+
+def recognize_frames(recognizer, frames, detection=None, **tracker_options):
+    """Run a FaceTracker over (frame_index, RGB frame) pairs; returns results and stats."""
+    tracker = FaceTracker(recognizer, detection, **tracker_options)
+    for frame_index, frame in frames:
+        tracker.process_frame(frame, frame_index)
+    return {"results": tracker.result(), "stats": tracker.stats()}
@@ -0,0 +1,12 @@
+# backend/app/wsgi.py - WSGI entry point for multi-process serving
+#
+#   cd backend/app && gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Importing app.py only builds the Flask app; warm_up() then loads the face
+# models and the gallery. With preload_app (gunicorn.conf.py) both happen
+# once, before the workers are forked.
+from app import app, warm_up
+
+warm_up()
+
+__all__ = ["app"]
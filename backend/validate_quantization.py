@@ -0,0 +1,99 @@
+# backend/validate_quantization.py - accuracy / memory / latency of the gallery precisions
+#
+#   python validate_quantization.py                 synthetic 50,000-row gallery
+#   python validate_quantization.py --size 200000 --rerank 4 8 16
+#   python validate_quantization.py --gallery       the trained gallery on disk
+#
+# float64 (what face_recognition returns) is the reference. For float32 and
+# int8 it reports how often the top-1 student differs, how often the
+# match / no-match decision at FaceRecognizer.TOLERANCE differs, and the
+# largest change in the top-1 distance. Set FaceRecognizer.GALLERY_PRECISION
+# (and GALLERY_RERANK for int8) from these numbers.
+#
+# MB is what each query scans. For int8 that is the codes only, which the
+# server memory-maps from the store (q8-<v>.codes.npy) and shares between
+# workers like the float32 matrix; the float32 rows are read just for re-ranking.
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ann_report import synthetic_gallery, timed
+from app.utils.gallery_store import GalleryStore
+from app.utils.matcher import ENCODING_DIM, make_matcher, QuantizedMatcher
+
+TOLERANCE = 0.6  # FaceRecognizer.TOLERANCE
+
+
+def gallery_bytes(matcher):
+    """Bytes a worker scans per query: the codes for int8, the matrix otherwise."""
+    if isinstance(matcher, QuantizedMatcher):
+        return matcher.codes.nbytes + matcher.code_norms.nbytes
+    return matcher.matrix.nbytes + matcher.sq_norms.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy delta of float32 / int8 galleries against float64")
+    parser.add_argument("--gallery", action="store_true", help="Use the trained gallery instead of synthetic data")
+    parser.add_argument("--size", type=int, default=50000, help="Synthetic gallery rows")
+    parser.add_argument("--queries", type=int, default=500, help="Query faces")
+    parser.add_argument("--batch", type=int, default=20, help="Faces per photo (one top_k call)")
+    parser.add_argument("--rerank", type=int, nargs="+", default=[1, 4, 8, 16], help="int8 re-rank shortlist sizes")
+    parser.add_argument("--noise", type=float, default=0.025, help="Per-dimension query noise")
+    parser.add_argument("--repeats", type=int, default=3, help="Timing runs per method")
+    args = parser.parse_args()
+
+    if args.gallery:
+        store = GalleryStore(Path(__file__).parent / "app" / "reference_encodings" / "gallery")
+        emails, embeddings, _, _ = store.load()
+    else:
+        emails, embeddings = synthetic_gallery(args.size)
+
+    rng = np.random.default_rng(1)
+    targets = rng.integers(0, len(emails), args.queries)
+    # Half the queries are enrolled students, half strangers from the same distribution
+    strangers = synthetic_gallery(args.queries // 2, seed=2)[1]
+    queries = np.concatenate([
+        embeddings[targets[:args.queries - len(strangers)]]
+        + rng.normal(scale=args.noise, size=(args.queries - len(strangers), ENCODING_DIM)),
+        strangers
+    ])
+    batches = [queries[i:i + args.batch] for i in range(0, len(queries), args.batch)]
+
+    def run(matcher):
+        results, ms = timed(lambda: [matcher.top_k(b, 1) for b in batches], args.repeats)
+        idx = np.concatenate([i for i, _ in results])[:, 0]
+        dist = np.concatenate([d for _, d in results])[:, 0]
+        return idx, dist, ms / len(batches)
+
+    reference = make_matcher(embeddings, emails, "float64")
+    ref_idx, ref_dist, ref_ms = run(reference)
+    ref_bytes = gallery_bytes(reference)
+
+    print(f"Gallery: {len(emails)} rows, {len(reference)} students; "
+          f"{args.queries} queries in batches of {args.batch}\n")
+    print(f"{'precision':<16}{'MB':>8}{'x less':>8}{'ms/photo':>10}{'top-1 diff':>12}"
+          f"{'match diff':>12}{'max |dd|':>10}")
+
+    methods = [("float64", "float64", None), ("float32", "float32", None)]
+    methods += [(f"int8 rerank={r}", "int8", r) for r in args.rerank]
+    for name, precision, rerank in methods:
+        start = time.perf_counter()
+        matcher = reference if precision == "float64" else make_matcher(
+            embeddings, emails, precision, rerank or 8
+        )
+        build_ms = (time.perf_counter() - start) * 1000
+        idx, dist, ms = run(matcher)
+
+        top1 = np.mean(idx != ref_idx)
+        decision = np.mean((dist <= TOLERANCE) != (ref_dist <= TOLERANCE))
+        delta = np.max(np.abs(dist - ref_dist)) if len(dist) else 0.0
+        size = gallery_bytes(matcher)
+        print(f"{name:<16}{size / 1e6:>8.1f}{ref_bytes / size:>8.1f}{ms:>10.2f}{top1:>12.4f}"
+              f"{decision:>12.4f}{delta:>10.2e}"
+              + (f"   (built in {build_ms:.0f} ms)" if precision == "int8" else ""))
+
+
+if __name__ == "__main__":
+    main()
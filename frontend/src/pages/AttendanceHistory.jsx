@@ -9,6 +9,7 @@ export default function AttendanceHistory() {
     date_from: "",
     date_to: "",
   });
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(false);
 
   useEffect(() => {
@@ -31,10 +32,11 @@ export default function AttendanceHistory() {
     }
   };
 
-  const fetchAttendance = async () => {
+  const fetchAttendance = async (cursor = null) => {
     setLoading(true);
     try {
       const params = new URLSearchParams(filters);
+      if (cursor) params.set("cursor", cursor);
 
       const response = await fetch(
         `http://localhost:5000/attendance/history?${params}`,
@@ -48,7 +50,10 @@ export default function AttendanceHistory() {
       const data = await response.json();
       console.log(data);
       
-      if (response.ok) setAttendance(data.records);
+      if (response.ok) {
+        setAttendance((prev) => (cursor ? [...prev, ...data.records] : data.records));
+        setNextCursor(data.next_cursor);
+      }
     } catch (e) {
       console.error(e);
     } finally {
@@ -64,6 +69,7 @@ export default function AttendanceHistory() {
   const handleExport = async () => {
     try {
       const params = new URLSearchParams(filters);
+      params.set("format", "xlsx");
 
       const response = await fetch(
         `http://localhost:5000/attendance/export?${params}`,
@@ -144,7 +150,7 @@ export default function AttendanceHistory() {
 
           <div className="flex items-end space-x-2">
             <button
-              onClick={fetchAttendance}
+              onClick={() => fetchAttendance()}
               disabled={loading}
               className="flex-1 bg-blue-600 text-white px-4 py-2 rounded-md hover:bg-blue-700 focus:outline-none focus:ring-2 focus:ring-blue-500 disabled:opacity-50"
             >
@@ -181,8 +187,8 @@ export default function AttendanceHistory() {
               </tr>
             </thead>
             <tbody className="bg-white divide-y divide-gray-200">
-              {attendance.map((record, index) => (
-                <tr key={index} className="hover:bg-gray-50">
+              {attendance.map((record) => (
+                <tr key={record.id} className="hover:bg-gray-50">
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900">
                     {record.date}
                   </td>
@@ -215,6 +221,18 @@ export default function AttendanceHistory() {
           </table>
         </div>
 
+        {nextCursor && (
+          <div className="text-center py-4 border-t border-gray-200">
+            <button
+              onClick={() => fetchAttendance(nextCursor)}
+              disabled={loading}
+              className="text-blue-600 hover:text-blue-800 text-sm font-medium disabled:opacity-50"
+            >
+              {loading ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
+
         {attendance.length === 0 && !loading && (
           <div className="text-center py-8 text-gray-500">
             <div className="text-4xl mb-4">📊</div>